@@ -14,6 +14,7 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
 from telegram import Update, InputFile, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
 from telegram.ext import Application, CommandHandler, ContextTypes, CallbackQueryHandler
 
 
@@ -31,8 +32,18 @@ ALERT_COOLDOWN_MIN = int(os.getenv("ALERT_COOLDOWN_MIN", "10"))
 WG_CONTAINER = os.getenv("WG_CONTAINER", "wg-easy")
 AWG_ENABLED = os.getenv("AWG_ENABLED", "false").lower() == "true"
 AWG_CONTAINER = os.getenv("AWG_CONTAINER", "amneziawg")
+OUTBOX_GLOBAL_RATE = float(os.getenv("OUTBOX_GLOBAL_RATE", "25"))
+OUTBOX_CHAT_RATE = float(os.getenv("OUTBOX_CHAT_RATE", "1"))
+OUTBOX_GROUP_CHAT_RATE = float(os.getenv("OUTBOX_GROUP_CHAT_RATE", "0.33"))
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "4"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "3"))
+BROADCAST_PROGRESS_SEC = int(os.getenv("BROADCAST_PROGRESS_SEC", "15"))
+BROADCAST_WINDOW = max(1, OUTBOX_WORKERS) * 4
+
+TELEGRAM_MAX_TEXT = 4096
 
 LAST_ALERT_TS = 0.0
+OUTBOX = None
 
 logging.basicConfig(
     level=logging.INFO,
@@ -40,26 +51,288 @@ logging.basicConfig(
 )
 
 
-async def reply_text(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str):
+# ----------------------- OUTBOUND QUEUE -----------------------
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one can be taken now)."""
+        self._refill()
+        wait = max(0.0, self.blocked_until - time.monotonic())
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+    def idle(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity and self.blocked_until <= time.monotonic()
+
+    def block(self, seconds: float):
+        # Telegram told us to back off: drain and hold the bucket
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+class Outbox:
+    """Central rate-limited sender for all outgoing messages.
+
+    Messages are queued per chat; a chat is handled by at most one worker at a
+    time so ordering is preserved, while different chats are sent concurrently.
+    Chats with interactive messages are served before chats holding only bulk
+    (broadcast) messages. Plain texts queued for the same chat while it waits for
+    its bucket are merged into a single message; photos and keyboards are sent as is.
+
+    A message that timed out is not retried since Telegram may have delivered it
+    already; other network errors are retried, so delivery is at-least-once.
+    """
+
+    PRIO_INTERACTIVE = 0
+    PRIO_BULK = 1
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.global_bucket = TokenBucket(OUTBOX_GLOBAL_RATE)
+        self.chat_buckets: dict[int, TokenBucket] = {}
+        self.pending: dict[int, list[dict]] = {}
+        # chat_id -> seq of its live entry in `ready`; other entries are stale
+        self.scheduled: dict[int, int] = {}
+        self.ready: asyncio.PriorityQueue[tuple[int, int, int]] = asyncio.PriorityQueue()
+        self.seq = 0
+        self.active: set[int] = set()
+        self.workers: list[asyncio.Task] = []
+        self.last_prune = time.monotonic()
+        # chat_id -> monotonic time until which Telegram asked it to wait
+        self.flooded: dict[int, float] = {}
+
+    def start(self):
+        for i in range(max(1, OUTBOX_WORKERS)):
+            self.workers.append(asyncio.create_task(self._worker(), name=f"outbox-{i}"))
+
+    async def stop(self, timeout: float = 5.0):
+        """Flush interactive messages for up to `timeout` seconds, then stop workers."""
+        # Bulk messages are resent when the broadcast resumes, don't hold shutdown for them
+        for chat_id, queue in list(self.pending.items()):
+            for item in [item for item in queue if item["bulk"]]:
+                queue.remove(item)
+                self._resolve(item, False)
+            if not queue and chat_id not in self.active:
+                del self.pending[chat_id]
+                self.scheduled.pop(chat_id, None)
+        deadline = time.monotonic() + timeout
+        while (self.pending or self.active) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        for task in self.workers:
+            task.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers.clear()
+        for chat_id, queue in self.pending.items():
+            for item in queue:
+                logging.warning("Outbox stopped, message to chat %s dropped: %.100s", chat_id, item["text"] or "<photo>")
+                self._resolve(item, False)
+        self.pending.clear()
+
+    def send(self, chat_id: int, text: str, bulk: bool = False, **kwargs) -> asyncio.Future:
+        """Queue a message; the returned future resolves to True once delivered."""
+        fut = asyncio.get_running_loop().create_future()
+        self._enqueue(chat_id, {"text": text, "kwargs": kwargs, "futures": [fut], "attempts": 0, "bulk": bulk})
+        return fut
+
+    def send_photo(self, chat_id: int, photo: InputFile, bulk: bool = False, **kwargs) -> asyncio.Future:
+        fut = asyncio.get_running_loop().create_future()
+        self._enqueue(chat_id, {"text": "", "photo": photo, "kwargs": kwargs, "futures": [fut], "attempts": 0, "bulk": bulk})
+        return fut
+
+    def _enqueue(self, chat_id: int, item: dict):
+        bulk = item["bulk"]
+        queue = self.pending.get(chat_id)
+        if queue is None:
+            self.pending[chat_id] = [item]
+            self._schedule(chat_id)
+        else:
+            queue.append(item)
+            if not bulk and chat_id in self.scheduled:
+                # Promote a chat waiting with bulk messages only
+                self._schedule(chat_id)
+
+    def _schedule(self, chat_id: int):
+        queue = self.pending[chat_id]
+        prio = self.PRIO_BULK if all(item["bulk"] for item in queue) else self.PRIO_INTERACTIVE
+        self.seq += 1
+        self.scheduled[chat_id] = self.seq
+        self.ready.put_nowait((prio, self.seq, chat_id))
+
+    def _take_batch(self, chat_id: int) -> dict:
+        queue = self.pending[chat_id]
+        batch = queue.pop(0)
+        if batch.get("photo") is not None or batch["kwargs"].get("reply_markup") is not None:
+            return batch
+        # Merge following texts with identical options (no keyboards)
+        while queue:
+            nxt = queue[0]
+            if nxt.get("photo") is not None or nxt["kwargs"] != batch["kwargs"]:
+                break
+            merged = batch["text"] + "\n\n" + nxt["text"]
+            if len(merged) > TELEGRAM_MAX_TEXT:
+                break
+            queue.pop(0)
+            batch = {
+                "text": merged,
+                "kwargs": batch["kwargs"],
+                "futures": batch["futures"] + nxt["futures"],
+                "attempts": max(batch["attempts"], nxt["attempts"]),
+                "bulk": batch["bulk"] and nxt["bulk"],
+            }
+        return batch
+
+    async def _acquire(self, chat_id: int):
+        chat_bucket = self.chat_buckets.get(chat_id)
+        if chat_bucket is None:
+            # Group and channel ids are negative and have a lower limit
+            rate = OUTBOX_GROUP_CHAT_RATE if chat_id < 0 else OUTBOX_CHAT_RATE
+            chat_bucket = self.chat_buckets[chat_id] = TokenBucket(rate, capacity=1)
+        while True:
+            wait = max(chat_bucket.delay(), self.global_bucket.delay())
+            if wait <= 0:
+                chat_bucket.take()
+                self.global_bucket.take()
+                return chat_bucket
+            await asyncio.sleep(wait)
+
+    def _prune_buckets(self, chat_id: int):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is not None and bucket.idle():
+            del self.chat_buckets[chat_id]
+        # Buckets are rarely idle right after a send, so sweep the rest now and then
+        now = time.monotonic()
+        if now - self.last_prune < 60:
+            return
+        self.last_prune = now
+        for cid in [cid for cid, b in self.chat_buckets.items() if cid not in self.pending and b.idle()]:
+            del self.chat_buckets[cid]
+
+    @staticmethod
+    def _resolve(batch: dict, ok: bool):
+        for fut in batch["futures"]:
+            if not fut.done():
+                fut.set_result(ok)
+
+    async def _worker(self):
+        while True:
+            _, seq, chat_id = await self.ready.get()
+            if self.scheduled.get(chat_id) != seq:
+                self.ready.task_done()
+                continue
+            del self.scheduled[chat_id]
+            self.active.add(chat_id)
+            try:
+                await self._deliver(chat_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.exception("Outbox worker failed for chat %s: %s", chat_id, e)
+            finally:
+                self.active.discard(chat_id)
+                if self.pending.get(chat_id):
+                    self._schedule(chat_id)
+                else:
+                    self.pending.pop(chat_id, None)
+                    self._prune_buckets(chat_id)
+                self.ready.task_done()
+
+    async def _deliver(self, chat_id: int):
+        chat_bucket = await self._acquire(chat_id)
+        if not self.pending.get(chat_id):
+            # stop() dropped this chat's bulk messages while we were waiting
+            return
+        # Take the batch only after waiting so that the burst gets merged
+        batch = self._take_batch(chat_id)
+        batch["attempts"] += 1
+        try:
+            if batch.get("photo") is not None:
+                await self.bot.send_photo(chat_id=chat_id, photo=batch["photo"], **batch["kwargs"])
+            else:
+                await self.bot.send_message(chat_id=chat_id, text=batch["text"], **batch["kwargs"])
+        except RetryAfter as e:
+            retry_after = e.retry_after.total_seconds() if isinstance(e.retry_after, timedelta) else float(e.retry_after)
+            chat_bucket.block(retry_after)
+            # Telegram doesn't say which limit was hit: treat it as per chat unless
+            # another chat is being throttled at the same time
+            now = time.monotonic()
+            self.flooded = {cid: until for cid, until in self.flooded.items() if until > now and cid != chat_id}
+            if self.flooded:
+                logging.warning("Flood limit hit (chat %s), pausing all sends for %.0fs", chat_id, retry_after)
+                self.global_bucket.block(retry_after)
+            else:
+                logging.warning("Flood limit hit (chat %s), retry after %.0fs", chat_id, retry_after)
+            self.flooded[chat_id] = now + retry_after
+            self.pending[chat_id].insert(0, batch)
+            return
+        except (Forbidden, BadRequest) as e:
+            logging.warning("Message to chat %s dropped: %s", chat_id, e)
+            self._resolve(batch, False)
+            return
+        except TimedOut as e:
+            logging.warning("Send to chat %s timed out, not retrying (may have been delivered): %s", chat_id, e)
+            self._resolve(batch, False)
+            return
+        except NetworkError as e:
+            if batch["attempts"] < OUTBOX_MAX_ATTEMPTS:
+                logging.warning("Send to chat %s failed (attempt %d), retrying: %s", chat_id, batch["attempts"], e)
+                chat_bucket.block(2 ** batch["attempts"])
+                self.pending[chat_id].insert(0, batch)
+                return
+            logging.warning("Message to chat %s dropped after %d attempts: %s", chat_id, batch["attempts"], e)
+            self._resolve(batch, False)
+            return
+        except Exception:
+            self._resolve(batch, False)
+            raise
+        self._resolve(batch, True)
+
+
+def outbox_send(chat_id: int, text: str, bulk: bool = False, **kwargs) -> asyncio.Future:
+    return OUTBOX.send(chat_id, text, bulk=bulk, **kwargs)
+
+
+async def reply_text(update: Update, context: ContextTypes.DEFAULT_TYPE, text: str, reply_markup: InlineKeyboardMarkup | None = None):
     chat_id = update.effective_chat.id if update.effective_chat else None
     if chat_id is None:
         return
-    await context.bot.send_message(chat_id=chat_id, text=text)
+    if reply_markup is not None:
+        outbox_send(chat_id, text, reply_markup=reply_markup)
+    else:
+        outbox_send(chat_id, text)
 
 
 async def reply_html(update: Update, context: ContextTypes.DEFAULT_TYPE, html: str):
     chat_id = update.effective_chat.id if update.effective_chat else None
     if chat_id is None:
         return
-    await context.bot.send_message(chat_id=chat_id, text=html, parse_mode="HTML", disable_web_page_preview=True)
+    outbox_send(chat_id, html, parse_mode="HTML", disable_web_page_preview=True)
 
 
 async def reply_photo(update: Update, context: ContextTypes.DEFAULT_TYPE, filepath: str, filename: str = "image.png"):
     chat_id = update.effective_chat.id if update.effective_chat else None
     if chat_id is None:
         return
+    # Read now: the file may be overwritten before the queued photo is sent
     with open(filepath, 'rb') as f:
-        await context.bot.send_photo(chat_id=chat_id, photo=f)
+        OUTBOX.send_photo(chat_id, InputFile(f.read(), filename=filename))
 
 
 async def init_db():
@@ -101,6 +374,28 @@ async def init_db():
             )
             """
         )
+        await db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS broadcasts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                text TEXT NOT NULL,
+                admin_chat_id INTEGER NOT NULL,
+                status TEXT NOT NULL,          -- 'running' | 'done'
+                created_ts INTEGER NOT NULL,
+                finished_ts INTEGER
+            )
+            """
+        )
+        await db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS broadcast_targets (
+                broadcast_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                status TEXT NOT NULL,          -- 'pending' | 'sent' | 'failed'
+                PRIMARY KEY (broadcast_id, user_id)
+            )
+            """
+        )
         await db.commit()
 
 
@@ -181,11 +476,8 @@ async def maybe_alert(cpu: float, mem: float, in_bps: float, out_bps: float):
                 msg.append(
                     f"NET: IN {in_mbps:.1f} Mbps, OUT {out_mbps:.1f} Mbps ≥ {ALERT_NET_MBPS} Mbps"
                 )
-            try:
-                await app.bot.send_message(chat_id=chat_id, text="\n".join(msg))
-                LAST_ALERT_TS = now
-            except Exception:
-                pass
+            outbox_send(chat_id, "\n".join(msg))
+            LAST_ALERT_TS = now
 
 
 async def get_allowed_chat_id() -> int | None:
@@ -207,11 +499,11 @@ async def cmd_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     allowed = await get_allowed_chat_id()
     if allowed is None:
         await set_allowed_chat_id(chat_id)
-        await update.message.reply_text("✅ Chat authorized. Use /help")
+        await reply_text(update, context, "✅ Chat authorized. Use /help")
     elif allowed == chat_id:
-        await update.message.reply_text("✅ Already authorized. Use /help")
+        await reply_text(update, context, "✅ Already authorized. Use /help")
     else:
-        await update.message.reply_text("⛔ This bot is locked to another chat")
+        await reply_text(update, context, "⛔ This bot is locked to another chat")
 
 
 def guard(func):
@@ -232,7 +524,7 @@ async def cmd_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
     ]
     # Works for both message and callback contexts
     if update.message:
-        await update.message.reply_text("Выберите действие:", reply_markup=InlineKeyboardMarkup(kb))
+        await reply_text(update, context, "Выберите действие:", reply_markup=InlineKeyboardMarkup(kb))
     else:
         await reply_text(update, context, "Выберите действие:")
 
@@ -453,10 +745,7 @@ async def _notify_admin_new_request(app_handle: Application, req_id: int, user_i
         InlineKeyboardButton("❌ Отклонить", callback_data=f"reject_xray_{req_id}")
     ]]
     text = f"Новый запрос Xray\nuser_id: {user_id}\nusername: {uname}\nrequest_id: {req_id}"
-    try:
-        await app_handle.bot.send_message(chat_id=chat_id, text=text, reply_markup=InlineKeyboardMarkup(kb))
-    except Exception:
-        pass
+    outbox_send(chat_id, text, reply_markup=InlineKeyboardMarkup(kb))
 
 
 async def _create_or_update_request(user_id: int, username: str | None) -> int:
@@ -528,10 +817,7 @@ async def _approve_request(req_id: int, approver_chat_id: int) -> tuple[bool, st
     # Send link to user
     label = (username or "xray").replace(" ", "_")
     url = _generate_vless_url(new_uuid, label)
-    try:
-        await app.bot.send_message(chat_id=user_id, text=f"Ваш доступ одобрен.\n{url}")
-    except Exception:
-        pass
+    outbox_send(user_id, f"Ваш доступ одобрен.\n{url}")
     return True, "Одобрено"
 
 
@@ -567,6 +853,140 @@ async def cmd_request_xray(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await _notify_admin_new_request(app, req_id, user.id, user.username)
 
 
+# ----------------------- BROADCAST -----------------------
+
+async def _create_broadcast(text: str, admin_chat_id: int) -> tuple[int, int]:
+    now = int(time.time())
+    async with aiosqlite.connect(DB_PATH) as db:
+        cur = await db.execute(
+            "INSERT INTO broadcasts(text, admin_chat_id, status, created_ts) VALUES(?,?,?,?)",
+            (text, admin_chat_id, "running", now),
+        )
+        bcast_id = cur.lastrowid
+        # Snapshot recipients so that a resumed broadcast reaches the same users
+        await db.execute(
+            "INSERT INTO broadcast_targets(broadcast_id, user_id, status) "
+            "SELECT DISTINCT ?, user_id, 'pending' FROM requests WHERE status='approved'",
+            (bcast_id,),
+        )
+        async with db.execute("SELECT COUNT(*) FROM broadcast_targets WHERE broadcast_id=?", (bcast_id,)) as cur:
+            row = await cur.fetchone()
+        await db.commit()
+    return int(bcast_id), int(row[0])
+
+
+async def _finish_broadcast(db: aiosqlite.Connection, bcast_id: int):
+    await db.execute(
+        "UPDATE broadcasts SET status='done', finished_ts=? WHERE id=?",
+        (int(time.time()), bcast_id),
+    )
+    await db.commit()
+
+
+async def _run_broadcast(bcast_id: int):
+    async with aiosqlite.connect(DB_PATH) as db:
+        async with db.execute("SELECT text, admin_chat_id FROM broadcasts WHERE id=?", (bcast_id,)) as cur:
+            row = await cur.fetchone()
+        if not row:
+            return
+        text, admin_chat_id = row
+        async with db.execute(
+            "SELECT user_id, status FROM broadcast_targets WHERE broadcast_id=?", (bcast_id,)
+        ) as cur:
+            targets = await cur.fetchall()
+
+        total = len(targets)
+        sent = sum(1 for _, st in targets if st == "sent")
+        failed = sum(1 for _, st in targets if st == "failed")
+        # Targets still pending after a restart are sent again (at-least-once)
+        todo = iter([uid for uid, st in targets if st == "pending"])
+        results: asyncio.Queue[tuple[int, bool]] = asyncio.Queue()
+        unsaved: list[tuple[str, int, int]] = []
+        inflight = 0
+
+        def submit() -> bool:
+            uid = next(todo, None)
+            if uid is None:
+                return False
+            fut = outbox_send(uid, text, bulk=True)
+            fut.add_done_callback(lambda f, uid=uid: results.put_nowait((uid, not f.cancelled() and f.result())))
+            return True
+
+        async def save():
+            await db.executemany(
+                "UPDATE broadcast_targets SET status=? WHERE broadcast_id=? AND user_id=?", unsaved
+            )
+            await db.commit()
+            unsaved.clear()
+
+        # Keep only a small window in the outbox so other traffic isn't starved
+        while inflight < BROADCAST_WINDOW and submit():
+            inflight += 1
+        last_save = last_report = time.monotonic()
+        try:
+            while inflight:
+                uid, ok = await results.get()
+                inflight -= 1
+                if ok:
+                    sent += 1
+                else:
+                    failed += 1
+                unsaved.append(("sent" if ok else "failed", bcast_id, uid))
+                if submit():
+                    inflight += 1
+                now = time.monotonic()
+                if len(unsaved) >= 50 or now - last_save >= 5:
+                    last_save = now
+                    await save()
+                if inflight and now - last_report >= BROADCAST_PROGRESS_SEC:
+                    last_report = now
+                    outbox_send(admin_chat_id, f"📣 Рассылка #{bcast_id}: {sent + failed}/{total} (ошибок: {failed})")
+        finally:
+            # Also on cancellation at shutdown: unsaved targets would be resent
+            if unsaved:
+                await save()
+
+        await _finish_broadcast(db, bcast_id)
+    outbox_send(admin_chat_id, f"✅ Рассылка #{bcast_id} завершена: доставлено {sent} из {total}, ошибок: {failed}")
+
+
+def _start_broadcast_task(application: Application, bcast_id: int):
+    tasks = application.bot_data.setdefault("broadcasts", set())
+    task = asyncio.create_task(_run_broadcast(bcast_id), name=f"broadcast-{bcast_id}")
+    tasks.add(task)
+    task.add_done_callback(tasks.discard)
+
+
+async def _resume_broadcasts(application: Application):
+    async with aiosqlite.connect(DB_PATH) as db:
+        async with db.execute("SELECT id FROM broadcasts WHERE status='running' ORDER BY id") as cur:
+            rows = await cur.fetchall()
+    for (bcast_id,) in rows:
+        logging.info("Resuming broadcast #%s", bcast_id)
+        _start_broadcast_task(application, bcast_id)
+
+
+@guard
+async def cmd_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # guard lets everyone through until a chat is authorized; broadcasting is admin-only
+    allowed = await get_allowed_chat_id()
+    if allowed is None or update.effective_chat.id != allowed:
+        await reply_text(update, context, "⛔ Рассылка доступна только авторизованному чату (/start)")
+        return
+    parts = (update.message.text or "").split(None, 1) if update.message else []
+    if len(parts) < 2 or not parts[1].strip():
+        await reply_text(update, context, "Использование: /broadcast <текст>")
+        return
+    bcast_id, total = await _create_broadcast(parts[1].strip(), update.effective_chat.id)
+    if total == 0:
+        async with aiosqlite.connect(DB_PATH) as db:
+            await _finish_broadcast(db, bcast_id)
+        await reply_text(update, context, "Нет пользователей с одобренным доступом")
+        return
+    await reply_text(update, context, f"📣 Рассылка #{bcast_id} запущена: {total} получателей")
+    _start_broadcast_task(context.application, bcast_id)
+
+
 async def scheduler_job():
     try:
         await sample_metrics()
@@ -575,14 +995,29 @@ async def scheduler_job():
 
 
 async def on_startup(application: Application):
+    global OUTBOX
     # Ensure DB exists before starting jobs
     await init_db()
+    OUTBOX = Outbox(application.bot)
+    OUTBOX.start()
+    await _resume_broadcasts(application)
     scheduler = AsyncIOScheduler(timezone=os.getenv("TZ", "UTC"))
     scheduler.add_job(scheduler_job, IntervalTrigger(seconds=METRICS_INTERVAL_SEC))
     scheduler.start()
     application.bot_data["scheduler"] = scheduler
 
 
+async def on_stop(application: Application):
+    # post_stop: the bot can still send here, unlike in post_shutdown.
+    # Stop broadcasts first: their unsent targets stay 'pending' and resume on next start
+    tasks = list(application.bot_data.get("broadcasts", ()))
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if OUTBOX is not None:
+        await OUTBOX.stop()
+
+
 def main():
     global app
     app = (
@@ -590,6 +1025,7 @@ def main():
         .builder()
         .token(TELEGRAM_BOT_TOKEN)
         .post_init(on_startup)
+        .post_stop(on_stop)
         .build()
     )
 
@@ -600,6 +1036,7 @@ def main():
     app.add_handler(CommandHandler("graph", cmd_graph))
     app.add_handler(CommandHandler("speedtest", cmd_speedtest))
     app.add_handler(CommandHandler("request_xray", cmd_request_xray))
+    app.add_handler(CommandHandler("broadcast", cmd_broadcast))
     app.add_handler(CallbackQueryHandler(handle_buttons))
 
     # Single blocking polling; container entrypoint restarts process if needed